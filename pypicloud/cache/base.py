@@ -144,10 +144,18 @@ class ICache(object):
         if old_pkg is not None and not self.allow_overwrite:
             raise ValueError("Package '%s' already exists!" % filename)
         if self.calculate_hashes:
-            file_data = data.read()
-            metadata["hash_sha256"] = hashlib.sha256(file_data).hexdigest()
-            metadata["hash_md5"] = hashlib.md5(file_data).hexdigest()
-            data = BytesIO(file_data)
+            # Hash and buffer the data in a single pass, one chunk at a time,
+            # so each chunk is still in cache when it is fed to both digests
+            sha256, md5 = hashlib.sha256(), hashlib.md5()
+            buf = BytesIO()
+            for chunk in iter(lambda: data.read(64 * 1024), b""):
+                sha256.update(chunk)
+                md5.update(chunk)
+                buf.write(chunk)
+            buf.seek(0)
+            metadata["hash_sha256"] = sha256.hexdigest()
+            metadata["hash_md5"] = md5.hexdigest()
+            data = buf
 
         new_pkg = self.new_package(name, version, filename, summary=summary, origin=origin, **metadata)
         self.storage.upload(new_pkg, data)
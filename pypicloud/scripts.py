@@ -14,6 +14,7 @@ from pkg_resources import resource_string  # pylint: disable=E0611
 from pyramid.paster import bootstrap
 
 from pypicloud.access import SCHEMES, get_pwd_context
+from pypicloud.util import buffer_stream
 
 
 def gen_password(argv=None):
@@ -269,6 +270,11 @@ def migrate_packages(argv=None):
     for package in all_packages:
         print("Migrating %s" % package)
         with old_storage.open(package) as data:
+            # Some storage backends stream the package data, but uploading
+            # may require a seekable object (e.g. to compute Content-Length)
+            seekable = getattr(data, "seekable", None)
+            if seekable is None or not seekable():
+                data = buffer_stream(data)
             # we need to recalculate the path for the new storage config
             package.data.pop("path", None)
             new_storage.upload(package, data)
@@ -82,8 +82,10 @@ class IStorage(object):
         """
         Get a buffer object that can read the package data
 
-        This should be a context manager. It is used in migration scripts, not
-        directly by the web application.
+        This should be a context manager. It is used in migration scripts, and
+        by the web application to serve package data when ``stream_files`` is
+        enabled. The returned object only needs to support ``read()``; it may
+        be a non-seekable stream.
 
         Parameters
         ----------
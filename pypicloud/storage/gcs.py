@@ -4,7 +4,6 @@ import json
 import logging
 import os
 import posixpath
-from datetime import timedelta
 
 from google.auth import compute_engine
 from google.auth.transport import requests
@@ -202,7 +201,7 @@ class GoogleCloudStorage(ObjectStoreStorage):
         else:
             signing_credentials = None
         return blob.generate_signed_url(
-            expiration=timedelta(seconds=self.expire_after),
+            expiration=self._expire_delta,
             credentials=signing_credentials,
             version="v4",
         )
@@ -1,20 +1,73 @@
 """ Store packages in S3 """
 import logging
-from binascii import hexlify
+import sys
 from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache, partial
 from hashlib import md5
-from io import BytesIO
-from urllib.request import urlopen
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+from urllib.request import getproxies, proxy_bypass
 
+import urllib3
 from pyramid.httpexceptions import HTTPFound
 from pyramid.settings import asbool
 
 from pypicloud.models import Package
+from pypicloud.util import TimedCache
 
 from .base import IStorage
 
 LOG = logging.getLogger(__name__)
 
+# Shared connection pool so that open() doesn't pay for a new TCP/TLS
+# handshake on every download
+_HTTP = urllib3.PoolManager(maxsize=32, retries=urllib3.Retry(3))
+
+
+@lru_cache(maxsize=None)
+def _proxy_manager(proxy_url: str) -> urllib3.ProxyManager:
+    """Get a shared connection pool that goes through a proxy"""
+    return urllib3.ProxyManager(proxy_url, maxsize=32, retries=urllib3.Retry(3))
+
+
+def _get_pool(url: str) -> urllib3.PoolManager:
+    """Get the connection pool for a url, honouring the http_proxy,
+    https_proxy and no_proxy environment variables the way urlopen does
+    """
+    parsed = urlparse(url)
+    proxy_url = getproxies().get(parsed.scheme)
+    if proxy_url is None or proxy_bypass(parsed.netloc):
+        return _HTTP
+    return _proxy_manager(proxy_url)
+
+
+if sys.version_info >= (3, 9):
+    # The hash is only used to shard paths, so allow non-FIPS implementations
+    _md5 = partial(md5, usedforsecurity=False)
+else:
+    _md5 = md5
+
+
+@lru_cache(maxsize=8192)
+def _hash_prefix(filename: str) -> str:
+    """Calculate the short hash that is prepended to package paths"""
+    return _md5(filename.encode("utf-8")).digest()[:2].hex()
+
+
+# (argument name, setting name, conversion function, default value)
+_SETTINGS = (
+    ("expire_after", "expire_after", int, 60 * 60 * 24),
+    ("bucket_prefix", "prefix", str, ""),
+    ("upload_prefix", "upload_prefix", str, ""),
+    ("prepend_hash", "prepend_hash", asbool, True),
+    ("object_acl", "object_acl", str, None),
+    ("storage_class", "storage_class", str, None),
+    ("redirect_urls", "redirect_urls", asbool, True),
+    ("region_name", "region_name", str, None),
+    ("public_url", "public_url", asbool, False),
+)
+
 
 class ObjectStoreStorage(IStorage):
 
@@ -37,11 +90,16 @@ class ObjectStoreStorage(IStorage):
         storage_class=None,
         region_name=None,
         public_url=False,
+        url_cache=None,
         **kwargs
     ):
         super(ObjectStoreStorage, self).__init__(request, **kwargs)
         self.expire_after = expire_after
-        self.bucket_prefix = bucket_prefix
+        # Signing routines want the lifetime as a timedelta; build it once
+        self._expire_delta = (
+            timedelta(seconds=expire_after) if expire_after is not None else None
+        )
+        self.bucket_prefix = bucket_prefix or ""
         self.prepend_hash = prepend_hash
         self.redirect_urls = redirect_urls
         self.sse = sse
@@ -49,6 +107,9 @@ class ObjectStoreStorage(IStorage):
         self.storage_class = storage_class
         self.region_name = region_name
         self.public_url = public_url
+        # Signed urls for package paths. This is created in configure() so it
+        # is shared between the storage instances created for each request.
+        self.url_cache = url_cache if url_cache is not None else TimedCache(0)
 
         # Packages that are uploaded (web or api) can be prefixed with a special upload_prefix.
         # If this is not specified, upload_prefix will be set to the main bucket_prefix (which is optional).
@@ -63,6 +124,9 @@ class ObjectStoreStorage(IStorage):
         # Do make sure that if the upload_prefix is identical to bucket_prefix, that it is reverted to None as at
         # that point there is no way to differentiate, and a reload will process every package twice!
         self.upload_prefix = upload_prefix if upload_prefix != bucket_prefix else None
+        # Resolve which prefix each package origin is stored under once, so
+        # get_path doesn't have to re-evaluate it for every package
+        self._prefix_by_origin = {"upload": self.upload_prefix or self.bucket_prefix}
 
     def _generate_url(self, package: Package) -> str:
         """Subclasses must implement a method for generating signed URLs to
@@ -88,50 +152,65 @@ class ObjectStoreStorage(IStorage):
     @classmethod
     def configure(cls, settings):
         kwargs = super(ObjectStoreStorage, cls).configure(settings)
-        kwargs["expire_after"] = int(settings.get("storage.expire_after", 60 * 60 * 24))
-        kwargs["bucket_prefix"] = settings.get("storage.prefix", "")
-        kwargs["upload_prefix"] = settings.get("storage.upload_prefix", "")
-        kwargs["prepend_hash"] = asbool(settings.get("storage.prepend_hash", True))
-        kwargs["object_acl"] = settings.get("storage.object_acl", None)
-        kwargs["storage_class"] = storage_class = settings.get("storage.storage_class")
-        kwargs["redirect_urls"] = asbool(settings.get("storage.redirect_urls", True))
-        kwargs["region_name"] = settings.get("storage.region_name")
-        kwargs["public_url"] = asbool(settings.get("storage.public_url"))
-
+        for name, key, convert, default in _SETTINGS:
+            value = settings.get("storage." + key)
+            kwargs[name] = default if value is None else convert(value)
+
+        # Off by default. Urls signed with temporary credentials stop working
+        # when those credentials expire, regardless of expire_after.
+        url_cache_ttl = int(settings.get("storage.url_cache_ttl", 0))
+        kwargs["url_cache"] = TimedCache(
+            min(url_cache_ttl, kwargs["expire_after"] // 2)
+        )
         kwargs.update(cls._subclass_specific_config(settings, kwargs))
         return kwargs
 
-    def calculate_path(self, package):
+    def calculate_path(self, package: Package) -> str:
         """Calculates the path of a package"""
-        path = package.name + "/" + package.filename
         if self.prepend_hash:
-            m = md5()
-            m.update(package.filename.encode("utf-8"))
-            prefix = hexlify(m.digest()).decode("utf-8")[:4]
-            path = prefix + "/" + path
-        return path
+            prefix = _hash_prefix(package.filename)
+            return f"{prefix}/{package.name}/{package.filename}"
+        return f"{package.name}/{package.filename}"
 
-    def get_path(self, package):
+    def get_path(self, package: Package) -> str:
         """Get the fully-qualified bucket path for a package"""
-        if "path" not in package.data:
-            filename = self.calculate_path(package)
-            package.data["path"] = (self.upload_prefix if self.upload_prefix and package.origin == "upload" else self.bucket_prefix) + filename
-        return package.data["path"]
+        path = package.data.get("path")
+        if path is None:
+            prefix = self._prefix_by_origin.get(package.origin, self.bucket_prefix)
+            path = package.data["path"] = f"{prefix}{self.calculate_path(package)}"
+        return path
+
+    def _get_cached_url(self, package: Package) -> str:
+        """Get a signed URL to the package, reusing a recent one if possible"""
+        path = self.get_path(package)
+        url = self.url_cache.get(path)
+        if url is None:
+            url = self._generate_url(package)
+            self.url_cache[path] = url
+        return url
 
-    def get_url(self, package):
+    def get_url(self, package: Package) -> str:
         if self.redirect_urls:
             return super(ObjectStoreStorage, self).get_url(package)
         else:
-            return self._generate_url(package)
+            return self._get_cached_url(package)
 
-    def download_response(self, package):
-        return HTTPFound(location=self._generate_url(package))
+    def download_response(self, package: Package) -> HTTPFound:
+        return HTTPFound(location=self._get_cached_url(package))
 
     @contextmanager
     def open(self, package):
         url = self._generate_url(package)
-        handle = urlopen(url)
+        handle = _get_pool(url).request("GET", url, preload_content=False)
         try:
-            yield BytesIO(handle.read())
+            if handle.status >= 400:
+                # Error bodies are small, so read them and reuse the connection
+                handle.drain_conn()
+                raise HTTPError(url, handle.status, handle.reason, handle.headers, None)
+            yield handle
         finally:
-            handle.close()
+            # If the caller stopped reading early, drop the connection rather
+            # than downloading the rest of the package just to reuse it
+            if not handle.closed:
+                handle.close()
+            handle.release_conn()
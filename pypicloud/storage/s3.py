@@ -1,7 +1,6 @@
 """ Store packages in S3 """
 import logging
 import posixpath
-from datetime import timedelta
 from urllib.parse import quote, urlparse
 
 import boto3
@@ -286,5 +285,5 @@ class CloudFrontS3Storage(S3Storage):
             return url
 
         # To sign with a canned policy:
-        expires = utcnow() + timedelta(seconds=self.expire_after)
+        expires = utcnow() + self._expire_delta
         return self.cf_signer.generate_presigned_url(url, date_less_than=expires)
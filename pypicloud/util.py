@@ -2,9 +2,12 @@
 import logging
 import os
 import re
+import shutil
+import threading
 import time
 import unicodedata
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from io import BufferedIOBase, BytesIO
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 
 from distlib.locators import Locator
 from distlib.util import split_filename
@@ -131,10 +134,47 @@ def get_settings(settings: dict, prefix: str, **kwargs) -> dict:
     return computed
 
 
+def buffer_stream(stream: BufferedIOBase) -> BinaryIO:
+    """
+    Copy a non-seekable stream into a seekable in-memory buffer
+
+    If the stream advertises a Content-Length (e.g. a HTTP response), the
+    buffer is allocated up front and filled with ``readinto``. Otherwise the
+    data is copied in chunks. Either way each read is bounded, so we never
+    hold the full payload as a temporary ``bytes`` object in addition to the
+    buffer (urllib3's ``readinto`` reads into a temporary and copies).
+
+    """
+    headers = getattr(stream, "headers", None)
+    length = int(headers.get("Content-Length") or 0) if headers is not None else 0
+    chunk_size = 64 * 1024
+    buf = BytesIO()
+    if length > 0:
+        buf.seek(length - 1)
+        buf.write(b"\0")
+        offset = 0
+        with buf.getbuffer() as view:
+            while offset < length:
+                read = stream.readinto(view[offset : offset + chunk_size])
+                if not read:
+                    break
+                offset += read
+        buf.truncate(offset)
+        buf.seek(offset)
+    shutil.copyfileobj(stream, buf, chunk_size)
+    buf.seek(0)
+    return buf
+
+
 class TimedCache(dict):
     """
     Dict that will store entries for a given time, then evict them
 
+    Entries are evicted when they are accessed after expiring. Setting an entry
+    also evicts any expired entries that were set with ``[]``, so the cache
+    doesn't grow without bound. Entries stored with :meth:`~.set_expire` are
+    only evicted when accessed. The cache is safe to share between threads.
+
     Parameters
     ----------
     cache_time : int or None
@@ -157,32 +197,61 @@ class TimedCache(dict):
         self._cache_time = cache_time
         self._factory = factory
         self._times = {}  # type: Dict[str, float]
+        # Keys set with __setitem__, from oldest to newest. They all share
+        # cache_time, so they also expire in this order.
+        self._queue = {}  # type: Dict[str, None]
+        self._lock = threading.Lock()
 
     def _has_expired(self, key):
         """Check if a key is both present and expired"""
-        if key not in self._times or self._cache_time is None:
+        updated = self._times.get(key)
+        if updated is None or self._cache_time is None:
             return False
-        updated = self._times[key]
-        return updated is not None and time.time() - updated > self._cache_time
+        return time.time() - updated > self._cache_time
+
+    def _remove(self, key):
+        """Remove a key if present. Must be called with the lock held."""
+        self._times.pop(key, None)
+        self._queue.pop(key, None)
+        super(TimedCache, self).pop(key, None)
 
     def _evict(self, key):
         """Remove a key if it has expired"""
         if self._has_expired(key):
-            del self[key]
+            with self._lock:
+                if self._has_expired(key):
+                    self._remove(key)
+
+    def _evict_oldest(self):
+        """Remove expired keys from the front of the queue. Must be called with
+        the lock held."""
+        expired = []
+        for key in self._queue:
+            if not self._has_expired(key):
+                break
+            expired.append(key)
+        for key in expired:
+            self._remove(key)
 
     def __contains__(self, key):
         self._evict(key)
         return super(TimedCache, self).__contains__(key)
 
     def __delitem__(self, key):
-        del self._times[key]
-        super(TimedCache, self).__delitem__(key)
+        with self._lock:
+            super(TimedCache, self).__delitem__(key)
+            self._remove(key)
 
     def __setitem__(self, key, value):
         if self._cache_time == 0:
             return
-        self._times[key] = time.time()
-        super(TimedCache, self).__setitem__(key, value)
+        with self._lock:
+            # Re-insert so that the queue stays ordered from oldest to newest
+            self._queue.pop(key, None)
+            self._queue[key] = None
+            self._times[key] = time.time()
+            super(TimedCache, self).__setitem__(key, value)
+            self._evict_oldest()
 
     def __getitem__(self, key):
         self._evict(key)
@@ -236,5 +305,8 @@ class TimedCache(dict):
                 return
             expiration = time.time() + expiration - self._cache_time
 
-        self._times[key] = expiration
-        super(TimedCache, self).__setitem__(key, value)
+        with self._lock:
+            # Explicit expirations are out of order, so keep them off the queue
+            self._queue.pop(key, None)
+            self._times[key] = expiration
+            super(TimedCache, self).__setitem__(key, value)
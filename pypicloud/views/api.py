@@ -1,6 +1,7 @@
 """ Views for simple api calls that return json data """
 import logging
 import posixpath
+import shutil
 from contextlib import closing
 from io import BytesIO
 from urllib.request import urlopen
@@ -121,7 +122,7 @@ def download_package(context, request):
         return request.response
     if request.registry.stream_files:
         with request.db.storage.open(package) as data:
-            request.response.body = data.read()
+            shutil.copyfileobj(data, request.response.body_file, 64 * 1024)
         disp = CONTENT_DISPOSITION.tuples(filename=package.filename)
         request.response.headers.update(disp)
         cache = CACHE_CONTROL.tuples(
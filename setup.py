@@ -27,6 +27,7 @@ REQUIREMENTS = [
     "pyramid_tm",
     "requests",
     "transaction",
+    "urllib3>=1.26",
     "zope.sqlalchemy",
 ]
 
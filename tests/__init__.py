@@ -2,8 +2,8 @@
 import os
 import unittest
 from collections import defaultdict
+from unittest.mock import MagicMock
 
-from mock import MagicMock
 from pyramid.testing import DummyRequest
 
 from pypicloud.cache import ICache
@@ -121,3 +121,63 @@ class MockServerTest(unittest.TestCase):
         self.request.path_url = "/path/"
         self.params = {}
         self.request.param = lambda x, y=None: self.params.get(x, y)
+
+
+def parametrize(argnames, argvalues, ids):
+    """
+    Mark a test method to be run once for each set of arguments
+
+    Must be used on a subclass of :class:`~.ParametrizedTestCase`, which will
+    replace the method with one ``<name>_<id>`` test per row.
+
+    """
+    argnames = [name.strip() for name in argnames.split(",")]
+    argvalues, ids = list(argvalues), list(ids)
+    if len(ids) != len(argvalues):
+        raise ValueError(
+            "Got %d ids for %d rows of arguments" % (len(ids), len(argvalues))
+        )
+    for id_, values in zip(ids, argvalues):
+        if len(values) != len(argnames):
+            raise ValueError(
+                "Row %r has %d values, expected %d (%s)"
+                % (id_, len(values), len(argnames), ", ".join(argnames))
+            )
+
+    def decorator(fxn):
+        fxn.parametrize = [
+            (id_, dict(zip(argnames, values))) for id_, values in zip(ids, argvalues)
+        ]
+        return fxn
+
+    return decorator
+
+
+class ParametrizedTestCase(object):
+
+    """Mixin that expands methods decorated with :func:`~.parametrize`"""
+
+    def __init_subclass__(cls, **kwargs):
+        super(ParametrizedTestCase, cls).__init_subclass__(**kwargs)
+        for name, fxn in list(vars(cls).items()):
+            rows = getattr(fxn, "parametrize", None)
+            if rows is None:
+                continue
+            delattr(cls, name)
+            for id_, params in rows:
+                test_name = "%s_%s" % (name, id_)
+                if hasattr(cls, test_name):
+                    raise ValueError("Duplicate parametrized test %r" % test_name)
+                test = cls._make_test(fxn, params)
+                test.__name__ = test_name
+                test.__doc__ = "%s [%s]" % ((fxn.__doc__ or name).strip(), id_)
+                setattr(cls, test_name, test)
+
+    @staticmethod
+    def _make_test(fxn, params):
+        """Bind one row of arguments to a parametrized test method"""
+
+        def test(self):
+            return fxn(self, **params)
+
+        return test
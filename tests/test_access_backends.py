@@ -3,10 +3,10 @@
 import json
 import os
 import unittest
+from unittest.mock import MagicMock, PropertyMock, patch
 
 import transaction
 import zope.sqlalchemy
-from mock import MagicMock, PropertyMock, patch
 from mockldap import MockLdap
 from pyramid import testing
 from pyramid.authorization import ACLAuthorizationPolicy
@@ -1,7 +1,8 @@
 """ Tests for API endpoints """
 from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
 
-from mock import MagicMock, PropertyMock, patch
 from pyramid.httpexceptions import HTTPBadRequest, HTTPForbidden
 from pyramid.testing import DummyRequest
 
@@ -14,6 +15,11 @@ class TestApi(MockServerTest):
 
     """Tests for API endpoints"""
 
+    @classmethod
+    def setUpClass(cls):
+        super(TestApi, cls).setUpClass()
+        cls.dist = make_dist(url="https://pypi.org/simple/package.tar.gz")
+
     def setUp(self):
         super(TestApi, self).setUp()
         self.access = self.request.access = MagicMock()
@@ -47,9 +53,9 @@ class TestApi(MockServerTest):
 
     def test_delete_missing(self):
         """Deleting a missing package raises 400"""
-        context = MagicMock()
-        context.name = "pkg1"
-        context.version = "1.1"
+        context = SimpleNamespace(
+            name="pkg1", version="1.1", filename="pkg1-1.1.tar.gz"
+        )
         ret = api.delete_package(context, self.request)
         self.assertTrue(isinstance(ret, HTTPBadRequest))
 
@@ -104,7 +110,7 @@ class TestApi(MockServerTest):
     def test_download(self):
         """Downloading package returns download response from db"""
         db = self.request.db = MagicMock()
-        context = MagicMock()
+        context = SimpleNamespace(name="mypkg", filename="mypkg-1.1.tar.gz")
         ret = api.download_package(context, self.request)
         db.fetch.assert_called_with(context.filename)
         db.download_response.assert_called_with(db.fetch())
@@ -113,16 +119,15 @@ class TestApi(MockServerTest):
     def test_download_with_stream_files(self):
         """Downloading package returns download response from db with max age"""
         db = self.request.db = MagicMock()
-        data = MagicMock()
-        db.storage.open.return_value.__enter__.return_value = data
-        data.read.return_value = b""
+        db.storage.open.return_value.__enter__.return_value = BytesIO(b"test1234")
         self.request.registry.stream_files = True
         self.request.registry.package_max_age = 30
-        context = MagicMock()
+        context = SimpleNamespace(name="mypkg", filename="mypkg-1.1.tar.gz")
         ret = api.download_package(context, self.request)
         db.fetch.assert_called_with(context.filename)
         db.storage.open.assert_called_once_with(db.fetch())
         db.download_response.assert_not_called()
+        self.assertEqual(ret.body, b"test1234")
         self.assertDictContainsSubset(
             {"Cache-Control": "public, max-age=30"}, ret.headers
         )
@@ -132,7 +137,7 @@ class TestApi(MockServerTest):
         db = self.request.db = MagicMock()
         self.request.registry.fallback = "none"
         db.fetch.return_value = None
-        context = MagicMock()
+        context = SimpleNamespace(name="mypkg", filename="mypkg-1.1.tar.gz")
         ret = api.download_package(context, self.request)
         self.assertEqual(ret.status_code, 404)
 
@@ -142,7 +147,7 @@ class TestApi(MockServerTest):
         self.request.registry.fallback = "cache"
         self.request.access.can_update_cache.return_value = False
         db.fetch.return_value = None
-        context = MagicMock()
+        context = SimpleNamespace(name="mypkg", filename="mypkg-1.1.tar.gz")
         ret = api.download_package(context, self.request)
         self.assertEqual(ret, self.request.forbid())
 
@@ -154,7 +159,7 @@ class TestApi(MockServerTest):
         self.request.registry.fallback_url = "http://pypi.com"
         self.request.access.can_update_cache.return_value = True
         db.fetch.return_value = None
-        context = MagicMock()
+        context = SimpleNamespace(name="mypkg", filename="mypkg-1.1.tar.gz")
         locator().get_project.return_value = {context.filename: None, "urls": {}}
         ret = api.download_package(context, self.request)
         self.assertEqual(ret.status_code, 404)
@@ -169,19 +174,16 @@ class TestApi(MockServerTest):
         self.request.access.can_update_cache.return_value = True
         db.fetch.return_value = None
         fetch_dist.return_value = (MagicMock(), b"fds")
-        context = MagicMock()
-        context.filename = "package.tar.gz"
-        url = "https://pypi.org/simple/%s" % context.filename
-        dist = make_dist(url=url)
-        locator.get_releases.return_value = [dist]
+        context = SimpleNamespace(name="mypkg", filename="package.tar.gz")
+        locator.get_releases.return_value = [self.dist]
         ret = api.download_package(context, self.request)
         fetch_dist.assert_called_with(
             self.request,
-            dist["url"],
-            dist["name"],
-            dist["version"],
-            dist["summary"],
-            dist["requires_python"],
+            self.dist["url"],
+            self.dist["name"],
+            self.dist["version"],
+            self.dist["summary"],
+            self.dist["requires_python"],
         )
         self.assertEqual(ret.body, fetch_dist()[1])
         self.assertDictContainsSubset(
@@ -199,11 +201,8 @@ class TestApi(MockServerTest):
         self.request.registry.package_max_age = 30
         db.fetch.return_value = None
         fetch_dist.return_value = (MagicMock(), b"abc")
-        context = MagicMock()
-        context.filename = "package.tar.gz"
-        url = "https://pypi.org/simple/%s" % context.filename
-        dist = make_dist(url=url)
-        locator.get_releases.return_value = [dist]
+        context = SimpleNamespace(name="mypkg", filename="package.tar.gz")
+        locator.get_releases.return_value = [self.dist]
         ret = api.download_package(context, self.request)
         fetch_dist.assert_called_once()
         self.assertEqual(ret.body, fetch_dist()[1])
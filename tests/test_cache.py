@@ -4,12 +4,12 @@ import calendar
 import os
 import unittest
 from io import BytesIO
+from unittest.mock import ANY, MagicMock, patch
 
 import redis
 import transaction
 from dynamo3 import Throughput
 from flywheel.fields.types import UTC
-from mock import ANY, MagicMock, patch
 from pyramid.testing import DummyRequest
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
@@ -1,10 +1,10 @@
 """ Tests for gracefully reloading the caches """
 import unittest
 from datetime import timedelta
+from unittest.mock import MagicMock
 
 import redis
 import transaction
-from mock import MagicMock
 from pyramid.testing import DummyRequest
 from sqlalchemy.exc import OperationalError
 
@@ -1,10 +1,24 @@
 """ Tests for commandline scripts """
 import unittest
-
-from mock import patch
+from contextlib import contextmanager
+from io import BytesIO
+from unittest.mock import MagicMock, patch
 
 from pypicloud import scripts
 
+from . import make_package
+
+
+class StreamReader(object):
+
+    """Minimal non-seekable reader, as a storage backend's open() may return"""
+
+    def __init__(self, data):
+        self._data = BytesIO(data)
+
+    def read(self, size=-1):
+        return self._data.read(size)
+
 
 class TestScripts(unittest.TestCase):
 
@@ -115,3 +129,27 @@ class TestScripts(unittest.TestCase):
         self.assertFalse(ret)
         ret = scripts.bucket_validate("bucket..name")
         self.assertFalse(ret)
+
+    @patch("pypicloud.scripts.bootstrap")
+    def test_migrate_packages_buffers_stream(self, bootstrap):
+        """Migrating from a non-seekable stream uploads a seekable buffer"""
+        package = make_package()
+        old_storage, new_storage = MagicMock(), MagicMock()
+        old_storage.list.return_value = [package]
+
+        @contextmanager
+        def open_package(_):
+            yield StreamReader(b"package data")
+
+        old_storage.open.side_effect = open_package
+        bootstrap.side_effect = [
+            {"request": MagicMock(**{"db.storage": old_storage})},
+            {"request": MagicMock(**{"db.storage": new_storage})},
+        ]
+        uploaded = []
+        new_storage.upload.side_effect = lambda pkg, data: uploaded.append(
+            (data.seekable(), data.read())
+        )
+        scripts.migrate_packages(["old.ini", "new.ini"])
+        new_storage.upload.assert_called_once()
+        self.assertEqual(uploaded, [(True, b"package data")])
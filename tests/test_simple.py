@@ -1,9 +1,9 @@
 """ Unit tests for the simple endpoints """
 import unittest
+from functools import lru_cache, partial
 from io import BytesIO
-from types import MethodType
-
-from mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
 
 from pypicloud.auth import _request_login
 from pypicloud.views.simple import (
@@ -15,7 +15,19 @@ from pypicloud.views.simple import (
     upload,
 )
 
-from . import MockServerTest, make_dist, make_package
+from . import MockServerTest, ParametrizedTestCase, make_dist, make_package, parametrize
+
+
+UPLOAD_DATA = b"test1234"
+EXPECTED_SEARCH_FOO = ({"name": "foo", "version": "1.1", "summary": ""},)
+EXPECTED_SEARCH_PKG1 = ({"name": "pkg1", "version": "1.1", "summary": ""},)
+# Packages the user may read in the permission-filtering tests
+READABLE = {"pkg1": True, "b": True}
+
+
+def has_read_permission(name, _):
+    """has_permission side effect that only allows the packages in READABLE"""
+    return READABLE.get(name, False)
 
 
 class FileUpload(object):
@@ -24,7 +36,7 @@ class FileUpload(object):
         self.file = BytesIO(data)
 
 
-class TestSimple(MockServerTest):
+class TestSimple(ParametrizedTestCase, MockServerTest):
 
     """Unit tests for the /simple endpoints"""
 
@@ -32,85 +44,72 @@ class TestSimple(MockServerTest):
         super(TestSimple, self).setUp()
         self.request.access = MagicMock()
 
-    def test_upload(self):
-        """Upload endpoint returns the result of api call"""
-        self.params = {":action": "file_upload"}
-        name, version, content = "foo", "bar", FileUpload("testfile", b"test1234")
-        content.filename = "foo-1.2.tar.gz"
-        pkg = upload(self.request, content, name, version)
-
-        self.assertEqual(pkg, self.request.db.packages[content.filename])
-
-    def test_upload_bad_action(self):
-        """Upload endpoint only respects 'file_upload' action"""
-        self.params = {":action": "blah"}
-        name, version, content = "foo", "bar", "baz"
+    @parametrize(
+        "action, perm, preload, expect",
+        [
+            ("file_upload", True, False, "ok"),
+            ("blah", True, False, "400"),
+            ("file_upload", False, False, "403"),
+            ("file_upload", True, True, "409"),
+        ],
+        ids=["ok", "bad_action", "no_write_permission", "duplicate"],
+    )
+    def test_upload(self, action, perm, preload, expect):
+        """Upload endpoint returns the result of api call or an error response"""
+        self.params = {":action": action}
+        name, version = "foo", "1.2"
+        content = FileUpload("foo-1.2.tar.gz", UPLOAD_DATA)
+        self.request.access.has_permission.return_value = perm
+        if preload:
+            self.db.upload(content.filename, BytesIO(UPLOAD_DATA), name)
         response = upload(self.request, content, name, version)
-        self.assertEqual(response.status_code, 400)
-
-    def test_upload_no_write_permission(self):
-        """Upload without write permission returns 403"""
-        self.params = {":action": "file_upload"}
-        name, version, content = "foo", "bar", FileUpload("testfile", b"test1234")
-        content.filename = "foo-1.2.tar.gz"
-        self.request.access.has_permission.return_value = False
-        response = upload(self.request, content, name, version)
-        self.assertEqual(response, self.request.forbid())
-
-    def test_upload_duplicate(self):
-        """Uploading a duplicate package returns 409"""
-        self.params = {":action": "file_upload"}
-        name, version, content = "foo", "1.2", FileUpload("testfile", b"test1234")
-        content.filename = "foo-1.2.tar.gz"
-        self.db.upload(content.filename, content.file, name)
-        response = upload(self.request, content, name, version)
-        self.assertEqual(response.status_code, 409)
+        if expect == "ok":
+            self.assertEqual(response, self.request.db.packages[content.filename])
+        elif expect == "403":
+            self.assertEqual(response, self.request.forbid())
+        else:
+            self.assertEqual(response.status_code, int(expect))
 
     def test_search(self):
         """Pip search executes successfully"""
         self.params = {":action": "file_upload"}
-        name1, version1, content1 = "foo", "1.1", FileUpload("testfile", b"test1234")
-        content1.filename = "bar-1.2.tar.gz"
-        name2, version2, content2 = "bar", "1.0", FileUpload("testfile", b"test1234")
-        content2.filename = "bar-1.2.tar.gz"
+        name1, version1 = "foo", "1.1"
+        content1 = FileUpload("bar-1.2.tar.gz", UPLOAD_DATA)
+        name2, version2 = "bar", "1.0"
+        content2 = FileUpload("bar-1.2.tar.gz", UPLOAD_DATA)
         upload(self.request, content1, name1, version1)
         upload(self.request, content2, name2, version2)
 
         criteria = {"name": ["foo"], "summary": ["foo"]}
         response = search(self.request, criteria, "or")
-        expected = [{"name": "foo", "version": "1.1", "summary": ""}]
-        self.assertListEqual(response, expected)
+        self.assertListEqual(response, list(EXPECTED_SEARCH_FOO))
 
     def test_search_permission_filter(self):
         """Pip search only gets results that user has read perms for"""
         self.params = {":action": "file_upload"}
-        name1, version1, content1 = "pkg1", "1.1", FileUpload("testfile", b"test1234")
-        content1.filename = "pkg1-1.1.tar.gz"
-        name2, version2, content2 = "pkg2", "1.0", FileUpload("testfile", b"test1234")
-        content2.filename = "pkg2-1.0.tar.gz"
-        name3, version3, content3 = "other", "1.0", FileUpload("testfile", b"test1234")
-        content3.filename = "other-1.0.tar.gz"
+        name1, version1 = "pkg1", "1.1"
+        content1 = FileUpload("pkg1-1.1.tar.gz", UPLOAD_DATA)
+        name2, version2 = "pkg2", "1.0"
+        content2 = FileUpload("pkg2-1.0.tar.gz", UPLOAD_DATA)
+        name3, version3 = "other", "1.0"
+        content3 = FileUpload("other-1.0.tar.gz", UPLOAD_DATA)
         upload(self.request, content1, name1, version1)
         upload(self.request, content2, name2, version2)
         upload(self.request, content3, name3, version3)
-        self.request.access.has_permission.side_effect = lambda x, _: x == "pkg1"
+        self.request.access.has_permission.side_effect = has_read_permission
         criteria = {"name": ["pkg"]}
         response = search(self.request, criteria, "and")
-        self.assertCountEqual(
-            response, [{"name": "pkg1", "version": "1.1", "summary": ""}]
-        )
+        self.assertCountEqual(response, EXPECTED_SEARCH_PKG1)
 
     def test_list(self):
         """Simple list should return api call"""
-        self.request.db = MagicMock()
-        self.request.db.distinct.return_value = ["a", "b", "c"]
-        self.request.access.has_permission.side_effect = lambda x, _: x == "b"
+        self.request.db = MagicMock(**{"distinct.return_value": ["a", "b", "c"]})
+        self.request.access.has_permission.side_effect = has_read_permission
         result = simple(self.request)
         self.assertEqual(result, {"pkgs": ["b"]})
 
     def test_fallback_packages(self):
         """Fetch fallback packages"""
-        self.request.locator = MagicMock()
         version = "1.1"
         name = "foo"
         filename = "%s-%s.tar.gz" % (name, version)
@@ -119,11 +118,14 @@ class TestSimple(MockServerTest):
         wheel_url = "https://pypi.org/pypi/%s/%s" % (name, wheelname)
         dist = make_dist(url, name, version)
         wheel_dist = make_dist(wheel_url, name, version)
-        self.request.locator.get_releases.return_value = [dist, wheel_dist]
+        self.request.locator = MagicMock(
+            **{"get_releases.return_value": [dist, wheel_dist]}
+        )
         self.request.app_url = MagicMock()
         pkgs = get_fallback_packages(self.request, "foo", False)
-        self.request.app_url.assert_any_call("api", "package", name, filename)
-        self.request.app_url.assert_any_call("api", "package", name, wheelname)
+        calls = {args for args, _ in self.request.app_url.call_args_list}
+        self.assertIn(("api", "package", name, filename), calls)
+        self.assertIn(("api", "package", name, wheelname), calls)
         self.assertEqual(
             pkgs,
             {
@@ -144,7 +146,6 @@ class TestSimple(MockServerTest):
 
     def test_fallback_packages_redirect(self):
         """Fetch fallback packages with redirect URLs"""
-        self.request.locator = MagicMock()
         version = "1.1"
         name = "foo"
         filename = "%s-%s.tar.gz" % (name, version)
@@ -153,7 +154,9 @@ class TestSimple(MockServerTest):
         wheel_url = "https://pypi.org/pypi/%s/%s" % (name, wheelname)
         dist = make_dist(url, name, version)
         wheel_dist = make_dist(wheel_url, name, version)
-        self.request.locator.get_releases.return_value = [dist, wheel_dist]
+        self.request.locator = MagicMock(
+            **{"get_releases.return_value": [dist, wheel_dist]}
+        )
         pkgs = get_fallback_packages(self.request, "foo")
         self.assertEqual(
             pkgs,
@@ -175,7 +178,6 @@ class TestSimple(MockServerTest):
 
     def test_disallow_fallback_packages(self):
         """Disallow fetch fallback packages"""
-        self.request.locator = MagicMock()
         version = "1.1"
         name = "foo"
         filename = "%s-%s.tar.gz" % (name, version)
@@ -183,94 +185,228 @@ class TestSimple(MockServerTest):
         wheelname = "%s-%s.whl" % (name, version)
         wheel_url = "http://pypi.python.org/pypi/%s/%s" % (name, wheelname)
         dist = MagicMock()
-        dist.name = name
-        self.request.locator.get_project.return_value = {
-            version: dist,
-            "urls": {version: [url, wheel_url]},
-        }
+        dist.configure_mock(name=name)
+        self.request.locator = MagicMock(
+            **{
+                "get_project.return_value": {
+                    version: dist,
+                    "urls": {version: [url, wheel_url]},
+                }
+            }
+        )
         self.request.access.has_permission = MagicMock(return_value=False)
         pkgs = get_fallback_packages(self.request, "foo")
         self.assertEqual(pkgs, {})
 
 
-class PackageReadTestBase(unittest.TestCase):
+PACKAGE_URL = "https://pypi.example.com/api/package/"
+PACKAGE = make_package()
+PACKAGE2 = make_package(version="2.1")
+PACKAGE3 = make_package(version="2.1", hash_sha256="sha", hash_md5="md5")
+
+# fallback, always_show_upstream, package, perms, user, expected outcome
+READ_CASES = [
+    ("redirect", False, None, "", None, "should_redirect"),
+    ("redirect", False, None, "", "foo", "should_redirect"),
+    ("redirect", False, None, "r", None, "should_redirect"),
+    ("redirect", False, None, "r", "foo", "should_redirect"),
+    ("redirect", False, None, "rc", None, "should_redirect"),
+    ("redirect", False, None, "rc", "foo", "should_redirect"),
+    ("redirect", False, PACKAGE, "", None, "should_ask_auth"),
+    ("redirect", False, PACKAGE, "", "foo", "should_redirect"),
+    ("redirect", False, PACKAGE, "r", None, "should_serve"),
+    ("redirect", False, PACKAGE, "r", "foo", "should_serve"),
+    ("redirect", False, PACKAGE, "rc", None, "should_serve"),
+    ("redirect", False, PACKAGE, "rc", "foo", "should_serve"),
+    ("redirect", True, None, "", None, "should_redirect"),
+    ("redirect", True, None, "", "foo", "should_redirect"),
+    ("redirect", True, None, "r", None, "should_redirect"),
+    ("redirect", True, None, "r", "foo", "should_redirect"),
+    ("redirect", True, None, "rc", None, "should_redirect"),
+    ("redirect", True, None, "rc", "foo", "should_redirect"),
+    ("redirect", True, PACKAGE, "", None, "should_ask_auth"),
+    ("redirect", True, PACKAGE, "", "foo", "should_redirect"),
+    ("redirect", True, PACKAGE, "r", None, "should_serve_and_redirect"),
+    ("redirect", True, PACKAGE, "r", "foo", "should_serve_and_redirect"),
+    ("redirect", True, PACKAGE, "rc", None, "should_serve_and_redirect"),
+    ("redirect", True, PACKAGE, "rc", "foo", "should_serve_and_redirect"),
+    ("cache", False, None, "", None, "should_ask_auth"),
+    ("cache", False, None, "", "foo", "should_404"),
+    ("cache", False, None, "r", None, "should_ask_auth"),
+    ("cache", False, None, "r", "foo", "should_404"),
+    ("cache", False, None, "rc", None, "should_cache"),
+    ("cache", False, None, "rc", "foo", "should_cache"),
+    ("cache", False, PACKAGE, "", None, "should_ask_auth"),
+    ("cache", False, PACKAGE, "", "foo", "should_404"),
+    ("cache", False, PACKAGE, "r", None, "should_serve"),
+    ("cache", False, PACKAGE, "r", "foo", "should_serve"),
+    ("cache", False, PACKAGE, "rc", None, "should_serve"),
+    ("cache", False, PACKAGE, "rc", "foo", "should_serve"),
+    ("cache", True, None, "", None, "should_ask_auth"),
+    ("cache", True, None, "", "foo", "should_redirect"),
+    ("cache", True, None, "r", None, "should_ask_auth"),
+    ("cache", True, None, "r", "foo", "should_redirect"),
+    ("cache", True, None, "rc", None, "should_cache"),
+    ("cache", True, None, "rc", "foo", "should_cache"),
+    ("cache", True, PACKAGE, "", None, "should_ask_auth"),
+    ("cache", True, PACKAGE, "", "foo", "should_redirect"),
+    ("cache", True, PACKAGE, "r", None, "should_ask_auth"),
+    ("cache", True, PACKAGE, "r", "foo", "should_serve_and_redirect"),
+    ("cache", True, PACKAGE, "rc", None, "should_serve_and_redirect"),
+    ("cache", True, PACKAGE, "rc", "foo", "should_serve_and_redirect"),
+    ("none", None, None, "", None, "should_ask_auth"),
+    ("none", None, None, "", "foo", "should_404"),
+    ("none", None, None, "r", None, "should_404"),
+    ("none", None, None, "r", "foo", "should_404"),
+    ("none", None, None, "rc", None, "should_404"),
+    ("none", None, None, "rc", "foo", "should_404"),
+    ("none", None, PACKAGE, "", None, "should_ask_auth"),
+    ("none", None, PACKAGE, "", "foo", "should_404"),
+    ("none", None, PACKAGE, "r", None, "should_serve"),
+    ("none", None, PACKAGE, "r", "foo", "should_serve"),
+    ("none", None, PACKAGE, "rc", None, "should_serve"),
+    ("none", None, PACKAGE, "rc", "foo", "should_serve"),
+]
+
+
+def read_case_id(fallback, always_show_upstream, package, perms, user, _):
+    """Build a readable test name for a row of READ_CASES"""
+    return "_".join(
+        [
+            fallback,
+            "always_show" if always_show_upstream else "",
+            "no_package" if package is None else "package",
+            {"": "no_read", "r": "read", "rc": "write"}[perms],
+            "user" if user else "no_user",
+        ]
+    ).replace("__", "_")
+
+
+@lru_cache(maxsize=None)
+def _expected_pkgs(filename, url, hash_sha256=None, hash_md5=None):
+    """Build the expected package_versions response for a single package"""
+    return {
+        filename: {
+            "url": url,
+            "requires_python": None,
+            "hash_sha256": hash_sha256,
+            "hash_md5": hash_md5,
+            "non_hashed_url": url,
+        }
+    }
+
 
-    """Base class test for reading packages"""
+class TestPackageRead(ParametrizedTestCase, unittest.TestCase):
+
+    """Test reading packages with each fallback mode and set of permissions"""
 
-    fallback = None
-    always_show_upstream = None
     fallback_url = "https://pypi.org/pypi/"
     fallback_base_url = "https://pypi.org/"
 
     @classmethod
     def setUpClass(cls):
-        cls.package = make_package()
-        cls.package2 = make_package(version="2.1")
-        cls.package3 = make_package(version="2.1", hash_sha256="sha", hash_md5="md5")
+        super(TestPackageRead, cls).setUpClass()
+        cls._patcher = patch("pypicloud.views.simple.get_fallback_packages", new=Mock())
+        cls._get = cls._patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        super(TestPackageRead, cls).tearDownClass()
+        cls._patcher.stop()
 
     def setUp(self):
-        get = patch("pypicloud.views.simple.get_fallback_packages").start()
-        p2 = self.package2
-        self.fallback_packages = get.return_value = {
+        self._get.reset_mock()
+        p2 = PACKAGE2
+        self.fallback_packages = self._get.return_value = {
             p2.filename: {
                 "url": self.fallback_url + p2.filename,
                 "requires_python": None,
             },
         }
 
-    def tearDown(self):
-        patch.stopall()
-
     def get_request(
-        self, package=None, perms="", user=None, use_base_url=False, path=None
+        self,
+        fallback,
+        always_show_upstream=None,
+        package=None,
+        perms="",
+        user=None,
+        use_base_url=False,
+        path=None,
     ):
         """Construct a fake request"""
-        request = MagicMock()
-        request.registry.fallback = self.fallback
-        request.registry.always_show_upstream = self.always_show_upstream
-        request.registry.fallback_url = self.fallback_url
-        request.registry.fallback_base_url = (
-            self.fallback_base_url if use_base_url else None
+        registry = SimpleNamespace(
+            fallback=fallback,
+            always_show_upstream=always_show_upstream,
+            fallback_url=self.fallback_url,
+            fallback_base_url=self.fallback_base_url if use_base_url else None,
+            realm="pypi",
+        )
+        access = SimpleNamespace(
+            can_update_cache=lambda: "c" in perms,
+            has_permission=lambda name, perm: "r" in perms,
+        )
+        pkgs = [] if package is None else [package]
+        db = SimpleNamespace(
+            all=lambda name: pkgs, get_url=lambda pkg: PACKAGE_URL + pkg.filename
         )
-        request.authenticated_userid = user
-        request.is_authenticated = user is not None
-        request.access.can_update_cache = lambda: "c" in perms
-        request.access.has_permission.side_effect = lambda n, p: "r" in perms
-        request.request_login = MethodType(_request_login, request)
-        pkgs = []
-        if package is not None:
-            pkgs.append(package)
-
-        if path is not None:
-            request.path = path
-
-        request.db.all.return_value = pkgs
+        request = SimpleNamespace(
+            registry=registry,
+            access=access,
+            db=db,
+            authenticated_userid=user,
+            is_authenticated=user is not None,
+            path=path,
+        )
+        request.request_login = partial(_request_login, request)
         return request
 
+    @parametrize(
+        "fallback, always_show_upstream, package, perms, user, expected",
+        READ_CASES,
+        ids=[read_case_id(*row) for row in READ_CASES],
+    )
+    def test_read(self, fallback, always_show_upstream, package, perms, user, expected):
+        """Reading a package returns the expected response"""
+        request = self.get_request(fallback, always_show_upstream, package, perms, user)
+        getattr(self, expected)(request)
+
+    def test_read_redirect_base_url(self):
+        """No package, no read perms, no user with a fallback_base_url"""
+        self.should_base_json_redirect(
+            self.get_request(
+                "redirect", False, use_base_url=True, path="/pypi/package/json"
+            )
+        )
+
+    def test_read_none_package_read_hashes_no_user(self):
+        """Package, read perms, no user serves package hashes"""
+        self.should_serve_hashes(self.get_request("none", package=PACKAGE3, perms="r"))
+
     def should_ask_auth(self, request):
         """When requested, the endpoint should return a 401"""
-        ret = package_versions(self.package, request)
+        ret = package_versions(PACKAGE, request)
         self.assertEqual(ret.status_code, 401)
 
     def should_404(self, request):
         """When requested, the endpoint should return a 404"""
-        ret = package_versions(self.package, request)
+        ret = package_versions(PACKAGE, request)
         self.assertEqual(ret.status_code, 404)
 
     def should_403(self, request):
         """When requested, the endpoint should return a 403"""
-        ret = package_versions(self.package, request)
+        ret = package_versions(PACKAGE, request)
         self.assertEqual(ret.status_code, 403)
 
     def should_redirect(self, request):
         """When requested, the endpoint should redirect to the fallback"""
-        ret = package_versions(self.package, request)
+        ret = package_versions(PACKAGE, request)
         self.assertEqual(ret.status_code, 302)
-        self.assertEqual(ret.location, self.fallback_url + self.package.name + "/")
+        self.assertEqual(ret.location, self.fallback_url + PACKAGE.name + "/")
 
     def should_base_json_redirect(self, request):
         """When requested, the endpoint should redirect to the fallback"""
-        ret = package_versions_json(self.package, request)
+        ret = package_versions_json(PACKAGE, request)
         self.assertEqual(ret.status_code, 302)
         self.assertEqual(
             ret.location, self.fallback_base_url.rstrip("/") + request.path
@@ -278,31 +414,19 @@ class PackageReadTestBase(unittest.TestCase):
 
     def should_serve(self, request):
         """When requested, the endpoint should serve the packages"""
-        ret = package_versions(self.package, request)
-        self.assertEqual(
-            ret,
-            {
-                "pkgs": {
-                    self.package.filename: {
-                        "url": self.package.get_url(request),
-                        "requires_python": None,
-                        "hash_sha256": None,
-                        "hash_md5": None,
-                        "non_hashed_url": self.package.get_url(request),
-                    }
-                }
-            },
-        )
+        url = PACKAGE.get_url(request)
+        ret = package_versions(PACKAGE, request)
+        self.assertEqual(ret, {"pkgs": _expected_pkgs(PACKAGE.filename, url)})
         # Check the /json endpoint too
-        ret = package_versions_json(self.package, request)
+        ret = package_versions_json(PACKAGE, request)
         self.assertEqual(
             ret["releases"],
             {
                 "1.1": [
                     {
-                        "filename": self.package.filename,
+                        "filename": PACKAGE.filename,
                         "packagetype": "sdist",
-                        "url": self.package.get_url(request),
+                        "url": url,
                         "requires_python": None,
                     }
                 ]
@@ -311,31 +435,21 @@ class PackageReadTestBase(unittest.TestCase):
 
     def should_serve_hashes(self, request):
         """When requested, the endpoint should serve the packages with hashes"""
-        ret = package_versions(self.package3, request)
+        url = PACKAGE3.get_url(request)
+        ret = package_versions(PACKAGE3, request)
         self.assertEqual(
-            ret,
-            {
-                "pkgs": {
-                    self.package3.filename: {
-                        "url": self.package3.get_url(request),
-                        "requires_python": None,
-                        "hash_sha256": "sha",
-                        "hash_md5": "md5",
-                        "non_hashed_url": self.package3.get_url(request),
-                    }
-                }
-            },
+            ret, {"pkgs": _expected_pkgs(PACKAGE3.filename, url, "sha", "md5")}
         )
         # Check the /json endpoint too
-        ret = package_versions_json(self.package3, request)
+        ret = package_versions_json(PACKAGE3, request)
         self.assertEqual(
             ret["releases"],
             {
                 "2.1": [
                     {
-                        "filename": self.package3.filename,
+                        "filename": PACKAGE3.filename,
                         "packagetype": "sdist",
-                        "url": self.package.get_url(request),
+                        "url": url,
                         "md5_digest": "md5",
                         "digests": {"sha256": "sha", "md5": "md5"},
                         "requires_python": None,
@@ -346,355 +460,13 @@ class PackageReadTestBase(unittest.TestCase):
 
     def should_cache(self, request):
         """When requested, the endpoint should serve the fallback packages"""
-        ret = package_versions(self.package, request)
+        ret = package_versions(PACKAGE, request)
         self.assertEqual(ret, {"pkgs": self.fallback_packages})
 
     def should_serve_and_redirect(self, request):
         """Should serve mixture of package urls and redirect urls"""
-        ret = package_versions(self.package, request)
-        f2name = self.package2.filename
-        self.assertEqual(
-            ret,
-            {
-                "pkgs": {
-                    self.package.filename: {
-                        "url": self.package.get_url(request),
-                        "requires_python": None,
-                        "non_hashed_url": self.package.get_url(request),
-                        "hash_sha256": None,
-                        "hash_md5": None,
-                    },
-                    f2name: self.fallback_packages[f2name],
-                }
-            },
-        )
-
-
-class TestRedirect(PackageReadTestBase):
-
-    """Test reading packages with fallback=redirect and always_show_upstream=false"""
-
-    fallback = "redirect"
-    always_show_upstream = False
-
-    def test_no_package_no_read_no_user(self):
-        """No package, no read perms, no user"""
-        self.should_redirect(self.get_request())
-
-    def test_no_package_no_read_no_user_base_url(self):
-        """No package, no read perms, no user"""
-        self.should_base_json_redirect(
-            self.get_request(use_base_url=True, path="/pypi/package/json")
-        )
-
-    def test_no_package_no_read_user(self):
-        """No package, no read perms, user"""
-        self.should_redirect(self.get_request(user="foo"))
-
-    def test_no_package_read_no_user(self):
-        """No package, read perms, no user"""
-        self.should_redirect(self.get_request(perms="r"))
-
-    def test_no_package_read_user(self):
-        """No package, read perms, user"""
-        self.should_redirect(self.get_request(perms="r", user="foo"))
-
-    def test_no_package_write_no_user(self):
-        """No package, write perms, no user"""
-        self.should_redirect(self.get_request(perms="rc"))
-
-    def test_no_package_write_user(self):
-        """No package, write perms, user"""
-        self.should_redirect(self.get_request(perms="rc", user="foo"))
-
-    def test_package_no_read_no_user(self):
-        """Package, no read perms, no user."""
-        self.should_ask_auth(self.get_request(self.package, ""))
-
-    def test_package_no_read_user(self):
-        """Package, no read perms, user."""
-        self.should_redirect(self.get_request(self.package, "", "foo"))
-
-    def test_package_read_no_user(self):
-        """Package, read perms, no user."""
-        self.should_serve(self.get_request(self.package, "r"))
-
-    def test_package_read_user(self):
-        """Package, read perms, user."""
-        self.should_serve(self.get_request(self.package, "r", "foo"))
-
-    def test_package_write_no_user(self):
-        """Package, write perms, no user."""
-        self.should_serve(self.get_request(self.package, "rc"))
-
-    def test_package_write_user(self):
-        """Package, write perms, user."""
-        self.should_serve(self.get_request(self.package, "rc", "foo"))
-
-
-class TestRedirectAlwaysShow(PackageReadTestBase):
-
-    """Test reading packages with fallback=redirect and always_show_upstream=truue"""
-
-    fallback = "redirect"
-    always_show_upstream = True
-
-    def test_no_package_no_read_no_user(self):
-        """No package, no read perms, no user"""
-        self.should_redirect(self.get_request())
-
-    def test_no_package_no_read_user(self):
-        """No package, no read perms, user"""
-        self.should_redirect(self.get_request(user="foo"))
-
-    def test_no_package_read_no_user(self):
-        """No package, read perms, no user"""
-        self.should_redirect(self.get_request(perms="r"))
-
-    def test_no_package_read_user(self):
-        """No package, read perms, user"""
-        self.should_redirect(self.get_request(perms="r", user="foo"))
-
-    def test_no_package_write_no_user(self):
-        """No package, write perms, no user"""
-        self.should_redirect(self.get_request(perms="rc"))
-
-    def test_no_package_write_user(self):
-        """No package, write perms, user"""
-        self.should_redirect(self.get_request(perms="rc", user="foo"))
-
-    def test_package_no_read_no_user(self):
-        """Package, no read perms, no user."""
-        self.should_ask_auth(self.get_request(self.package, ""))
-
-    def test_package_no_read_user(self):
-        """Package, no read perms, user."""
-        self.should_redirect(self.get_request(self.package, "", "foo"))
-
-    def test_package_read_no_user(self):
-        """Package, read perms, no user."""
-        req = self.get_request(self.package, "r", "foo")
-        self.should_serve_and_redirect(req)
-
-    def test_package_read_user(self):
-        """Package, read perms, user."""
-        req = self.get_request(self.package, "r", "foo")
-        self.should_serve_and_redirect(req)
-
-    def test_package_write_no_user(self):
-        """Package, write perms, no user."""
-        req = self.get_request(self.package, "r", "foo")
-        self.should_serve_and_redirect(req)
-
-    def test_package_write_user(self):
-        """Package, write perms, user."""
-        req = self.get_request(self.package, "r", "foo")
-        self.should_serve_and_redirect(req)
-
-
-class TestCache(PackageReadTestBase):
-
-    """Test reading packages with fallback=cache and always_show_upstream=false"""
-
-    fallback = "cache"
-    always_show_upstream = False
-
-    def test_no_package_no_read_no_user(self):
-        """No package, no read perms, no user"""
-        self.should_ask_auth(self.get_request())
-
-    def test_no_package_no_read_user(self):
-        """No package, no read perms, user"""
-        self.should_404(self.get_request(user="foo"))
-
-    def test_no_package_read_no_user(self):
-        """No package, read perms, no user"""
-        self.should_ask_auth(self.get_request(perms="r"))
-
-    def test_no_package_read_user(self):
-        """No package, read perms, user"""
-        self.should_404(self.get_request(perms="r", user="foo"))
-
-    def test_no_package_write_no_user(self):
-        """No package, write perms, no user"""
-        self.should_cache(self.get_request(perms="rc"))
-
-    def test_no_package_write_user(self):
-        """No package, write perms, user"""
-        self.should_cache(self.get_request(perms="rc", user="foo"))
-
-    def test_package_no_read_no_user(self):
-        """Package, no read perms, no user."""
-        self.should_ask_auth(self.get_request(self.package, ""))
-
-    def test_package_no_read_user(self):
-        """Package, no read perms, user."""
-        self.should_404(self.get_request(self.package, "", "foo"))
-
-    def test_package_read_no_user(self):
-        """Package, read perms, no user."""
-        self.should_serve(self.get_request(self.package, "r"))
-
-    def test_package_read_user(self):
-        """Package, read perms, user."""
-        self.should_serve(self.get_request(self.package, "r", "foo"))
-
-    def test_package_write_no_user(self):
-        """Package, write perms, no user."""
-        self.should_serve(self.get_request(self.package, "rc"))
-
-    def test_package_write_user(self):
-        """Package, write perms, user."""
-        self.should_serve(self.get_request(self.package, "rc", "foo"))
-
-
-class TestCacheAlwaysShow(PackageReadTestBase):
-
-    """Test reading packages with fallback=cache and always_show_upstream=true"""
-
-    fallback = "cache"
-    always_show_upstream = True
-
-    def test_no_package_no_read_no_user(self):
-        """No package, no read perms, no user"""
-        self.should_ask_auth(self.get_request())
-
-    def test_no_package_no_read_user(self):
-        """No package, no read perms, user"""
-        self.should_redirect(self.get_request(user="foo"))
-
-    def test_no_package_read_no_user(self):
-        """No package, read perms, no user"""
-        self.should_ask_auth(self.get_request(perms="r"))
-
-    def test_no_package_read_user(self):
-        """No package, read perms, user"""
-        self.should_redirect(self.get_request(perms="r", user="foo"))
-
-    def test_no_package_write_no_user(self):
-        """No package, write perms, no user"""
-        self.should_cache(self.get_request(perms="rc"))
-
-    def test_no_package_write_user(self):
-        """No package, write perms, user"""
-        self.should_cache(self.get_request(perms="rc", user="foo"))
-
-    def test_package_no_read_no_user(self):
-        """Package, no read perms, no user."""
-        self.should_ask_auth(self.get_request(self.package, ""))
-
-    def test_package_no_read_user(self):
-        """Package, no read perms, user."""
-        self.should_redirect(self.get_request(self.package, "", "foo"))
-
-    def test_package_read_no_user(self):
-        """Package, read perms, no user."""
-        self.should_ask_auth(self.get_request(self.package, "r"))
-
-    def test_package_read_user(self):
-        """Package, read perms, user."""
-        req = self.get_request(self.package, "r", "foo")
-        self.should_serve_and_redirect(req)
-
-    def test_package_write_no_user(self):
-        """Package, write perms, no user."""
-        # Should serve package urls and fallback urls
-        req = self.get_request(self.package, "rc")
-        ret = package_versions(self.package, req)
-        p2 = self.package2
-        self.assertEqual(
-            ret,
-            {
-                "pkgs": {
-                    self.package.filename: {
-                        "url": self.package.get_url(req),
-                        "requires_python": None,
-                        "non_hashed_url": self.package.get_url(req),
-                        "hash_sha256": None,
-                        "hash_md5": None,
-                    },
-                    self.package2.filename: self.fallback_packages[p2.filename],
-                }
-            },
-        )
-
-    def test_package_write_user(self):
-        """Package, write perms, user."""
-        # Should serve package urls and fallback urls
-        req = self.get_request(self.package, "rc", "foo")
-        ret = package_versions(self.package, req)
-        p2 = self.package2
-        self.assertEqual(
-            ret,
-            {
-                "pkgs": {
-                    self.package.filename: {
-                        "url": self.package.get_url(req),
-                        "requires_python": None,
-                        "non_hashed_url": self.package.get_url(req),
-                        "hash_sha256": None,
-                        "hash_md5": None,
-                    },
-                    self.package2.filename: self.fallback_packages[p2.filename],
-                }
-            },
-        )
-
-
-class TestNoFallback(PackageReadTestBase):
-
-    """Tests for reading packages with fallback=none"""
-
-    fallback = "none"
-
-    def test_no_package_no_read_no_user(self):
-        """No package, no read perms, no user"""
-        self.should_ask_auth(self.get_request())
-
-    def test_no_package_no_read_user(self):
-        """No package, no read perms, user"""
-        self.should_404(self.get_request(user="foo"))
-
-    def test_no_package_read_no_user(self):
-        """No package, read perms, no user"""
-        self.should_404(self.get_request(perms="r"))
-
-    def test_no_package_read_user(self):
-        """No package, read perms, user"""
-        self.should_404(self.get_request(perms="r", user="foo"))
-
-    def test_no_package_write_no_user(self):
-        """No package, write perms, no user"""
-        self.should_404(self.get_request(perms="rc"))
-
-    def test_no_package_write_user(self):
-        """No package, write perms, user"""
-        self.should_404(self.get_request(perms="rc", user="foo"))
-
-    def test_package_no_read_no_user(self):
-        """Package, no read perms, no user."""
-        self.should_ask_auth(self.get_request(self.package, ""))
-
-    def test_package_no_read_user(self):
-        """Package, no read perms, user."""
-        self.should_404(self.get_request(self.package, "", "foo"))
-
-    def test_package_read_no_user(self):
-        """Package, read perms, no user."""
-        self.should_serve(self.get_request(self.package, "r"))
-
-    def test_package_read_hashes_no_user(self):
-        """Package, read perms, no user."""
-        self.should_serve_hashes(self.get_request(self.package3, "r"))
-
-    def test_package_read_user(self):
-        """Package, read perms, user."""
-        self.should_serve(self.get_request(self.package, "r", "foo"))
-
-    def test_package_write_no_user(self):
-        """Package, write perms, no user."""
-        self.should_serve(self.get_request(self.package, "rc"))
-
-    def test_package_write_user(self):
-        """Package, write perms, user."""
-        self.should_serve(self.get_request(self.package, "rc", "foo"))
+        ret = package_versions(PACKAGE, request)
+        f2name = PACKAGE2.filename
+        expected = dict(_expected_pkgs(PACKAGE.filename, PACKAGE.get_url(request)))
+        expected[f2name] = self.fallback_packages[f2name]
+        self.assertEqual(ret, {"pkgs": expected})
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 """ Tests for package storage backends """
+import hashlib
 import json
 import os
 import re
@@ -9,12 +10,14 @@ import tempfile
 import time
 import unittest
 from io import BytesIO
+from unittest.mock import ANY, MagicMock, call, patch
+from urllib.error import HTTPError
 from urllib.parse import parse_qs, urlparse
 
 import boto3
+import urllib3
 import vcr
 from botocore.exceptions import ClientError
-from mock import ANY, MagicMock, patch
 from moto import mock_s3
 
 from pypicloud.dateutil import utcnow
@@ -25,6 +28,7 @@ from pypicloud.storage import (
     GoogleCloudStorage,
     S3Storage,
     get_storage_impl,
+    object_store,
 )
 
 from . import make_package
@@ -96,6 +100,37 @@ class TestS3Storage(unittest.TestCase):
             query["AWSAccessKeyId"][0], self.settings["storage.aws_access_key_id"]
         )
 
+    def test_get_url_cached(self):
+        """Signed urls are reused across storage instances"""
+        package = make_package()
+        kwargs = S3Storage.configure(
+            dict(self.settings, **{"storage.url_cache_ttl": "600"})
+        )
+        url = S3Storage(MagicMock(), **kwargs).download_response(package).location
+        storage = S3Storage(MagicMock(), **kwargs)
+        with patch.object(storage, "_generate_url") as generate_url:
+            self.assertEqual(storage.download_response(package).location, url)
+        generate_url.assert_not_called()
+
+    def test_get_url_not_cached_by_default(self):
+        """Signed urls are generated for every download unless configured"""
+        package = make_package()
+        kwargs = S3Storage.configure(self.settings)
+        S3Storage(MagicMock(), **kwargs).download_response(package)
+        storage = S3Storage(MagicMock(), **kwargs)
+        with patch.object(storage, "_generate_url", return_value="url"):
+            self.assertEqual(storage.download_response(package).location, "url")
+
+    def test_url_cache_ttl_capped(self):
+        """url_cache_ttl cannot outlive half of expire_after"""
+        kwargs = S3Storage.configure(
+            dict(
+                self.settings,
+                **{"storage.url_cache_ttl": "600", "storage.expire_after": "100"}
+            )
+        )
+        self.assertEqual(kwargs["url_cache"]._cache_time, 50)
+
     def test_delete(self):
         """delete() should remove package from storage"""
         package = make_package()
@@ -104,6 +139,59 @@ class TestS3Storage(unittest.TestCase):
         keys = list(self.bucket.objects.all())
         self.assertEqual(len(keys), 0)
 
+    @patch("pypicloud.storage.object_store._get_pool")
+    def test_open(self, get_pool):
+        """open() streams the package data instead of buffering it"""
+        package = make_package()
+        http = get_pool.return_value
+        handle = http.request.return_value
+        handle.status = 200
+        handle.closed = True
+        with self.storage.open(package) as data:
+            self.assertIs(data, handle)
+        http.request.assert_called_once_with("GET", ANY, preload_content=False)
+        handle.read.assert_not_called()
+        handle.close.assert_not_called()
+        handle.release_conn.assert_called_once_with()
+
+    @patch("pypicloud.storage.object_store._get_pool")
+    def test_open_error(self, get_pool):
+        """open() raises if the object store returns an error"""
+        handle = get_pool.return_value.request.return_value
+        handle.status = 403
+        handle.closed = True
+        with self.assertRaises(HTTPError):
+            with self.storage.open(make_package()):
+                pass
+        self.assertEqual(handle.method_calls, [call.drain_conn(), call.release_conn()])
+
+    @patch("pypicloud.storage.object_store._get_pool")
+    def test_open_caller_error(self, get_pool):
+        """open() drops the connection if the caller stops reading early"""
+        handle = get_pool.return_value.request.return_value
+        handle.status = 200
+        handle.closed = False
+        with self.assertRaises(ValueError):
+            with self.storage.open(make_package()):
+                raise ValueError()
+        self.assertEqual(handle.method_calls, [call.close(), call.release_conn()])
+
+    @patch.dict(os.environ, {"https_proxy": "http://proxy.example.com:3128"})
+    def test_open_proxy(self):
+        """open() honours the proxy environment variables"""
+        pool = object_store._get_pool("https://mybucket.s3.amazonaws.com/a")
+        self.assertIsInstance(pool, urllib3.ProxyManager)
+        self.assertEqual(pool.proxy.host, "proxy.example.com")
+
+    @patch.dict(
+        os.environ,
+        {"https_proxy": "http://proxy.example.com:3128", "no_proxy": "amazonaws.com"},
+    )
+    def test_open_no_proxy(self):
+        """open() connects directly to hosts listed in no_proxy"""
+        pool = object_store._get_pool("https://mybucket.s3.amazonaws.com/a")
+        self.assertIs(pool, object_store._HTTP)
+
     def test_upload(self):
         """Uploading package sets metadata and sends to S3"""
         package = make_package(requires_python="3.6")
@@ -136,6 +224,35 @@ class TestS3Storage(unittest.TestCase):
         match = re.match(pattern, key.key)
         self.assertIsNotNone(match)
 
+    def test_calculate_path_hash(self):
+        """The prepended hash is stable for a given filename"""
+        self.storage.prepend_hash = True
+        package = make_package()
+        hashed = hashlib.md5(package.filename.encode("utf-8")).hexdigest()[:4]
+        expected = "%s/%s/%s" % (hashed, package.name, package.filename)
+        self.assertEqual(self.storage.calculate_path(package), expected)
+        self.assertEqual(self.storage.calculate_path(make_package()), expected)
+
+    def test_get_path_upload_prefix(self):
+        """Uploaded packages are stored under the upload_prefix"""
+        kwargs = S3Storage.configure(
+            dict(self.settings, **{"storage.upload_prefix": "uploads/"})
+        )
+        storage = S3Storage(MagicMock(), **kwargs)
+        storage.prepend_hash = False
+        package = make_package()
+        package.origin = "upload"
+        self.assertEqual(storage.get_path(package), "uploads/mypkg/" + package.filename)
+        package = make_package()
+        package.origin = "fallback"
+        self.assertEqual(storage.get_path(package), "mypkg/" + package.filename)
+
+    def test_get_path_no_bucket_prefix(self):
+        """A missing bucket_prefix doesn't end up in the path"""
+        storage = S3Storage(MagicMock(), bucket=self.bucket, prepend_hash=False)
+        package = make_package()
+        self.assertEqual(storage.get_path(package), "mypkg/" + package.filename)
+
     def test_create_bucket_eu(self):
         """If S3 bucket doesn't exist, create it"""
         settings = {
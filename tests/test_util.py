@@ -1,7 +1,10 @@
 """ Tests for pypicloud utilities """
+import threading
 import unittest
+from io import BytesIO
+from unittest.mock import patch
 
-from mock import patch
+from urllib3 import HTTPResponse
 
 from pypicloud import util
 
@@ -114,6 +117,51 @@ class TestTimedCache(unittest.TestCase):
         self.assertEqual(cache.get("a"), 1)
         self.assertEqual(cache.get("b", 6), 6)
 
+    @patch("pypicloud.util.time")
+    def test_evict_on_insert(self, time):
+        """Inserting a key evicts other keys that have expired"""
+        cache = util.TimedCache(5)
+        time.time.return_value = 0
+        cache["a"] = 1
+        time.time.return_value = 3
+        cache["b"] = 2
+        time.time.return_value = 6
+        cache["c"] = 3
+        self.assertEqual(dict(cache), {"b": 2, "c": 3})
+
+    @patch("pypicloud.util.time")
+    def test_evict_on_insert_after_set_expire(self, time):
+        """Entries that never expire don't stop eviction on insert"""
+        cache = util.TimedCache(5)
+        time.time.return_value = 0
+        cache.set_expire("forever", 1, None)
+        cache["a"] = 2
+        time.time.return_value = 6
+        cache["b"] = 3
+        self.assertEqual(dict(cache), {"forever": 1, "b": 3})
+
+    def test_threads(self):
+        """Concurrent reads and writes don't raise"""
+        cache = util.TimedCache(0.0001)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(2000):
+                    key = "%d-%d" % (n, i % 50)
+                    cache[key] = i
+                    cache.get(key)
+                    key in cache  # pylint: disable=W0104
+            except Exception as e:  # pylint: disable=W0703
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
     @patch("pypicloud.util.time")
     def test_set_no_expire(self, time):
         """set_expire with None will never expire value"""
@@ -170,3 +218,37 @@ class TestGetPackagetype(unittest.TestCase):
         """get package type for invalid file name"""
         packagetype = util.get_packagetype("mypkg-1.1.tar")
         self.assertEqual(packagetype, "")
+
+
+class TestBufferStream(unittest.TestCase):
+
+    """Tests for buffer_stream"""
+
+    def test_buffer_stream(self):
+        """buffer_stream copies a stream into a seekable buffer"""
+        buf = util.buffer_stream(BytesIO(b"abc" * 100000))
+        self.assertEqual(buf.tell(), 0)
+        self.assertEqual(buf.read(), b"abc" * 100000)
+
+    def test_buffer_stream_content_length(self):
+        """buffer_stream fills the buffer from a response in bounded reads"""
+        data = b"abc" * 100000
+        stream = HTTPResponse(
+            BytesIO(data),
+            headers={"Content-Length": str(len(data))},
+            preload_content=False,
+        )
+        with patch.object(stream, "read", wraps=stream.read) as read:
+            buf = util.buffer_stream(stream)
+        self.assertEqual(buf.read(), data)
+        self.assertTrue(read.called)
+        self.assertLessEqual(max(args[0] for args, _ in read.call_args_list), 64 * 1024)
+
+    def test_buffer_stream_short_content_length(self):
+        """buffer_stream tolerates an inaccurate Content-Length"""
+        stream = BytesIO(b"abcdef")
+        stream.headers = {"Content-Length": "3"}
+        self.assertEqual(util.buffer_stream(stream).read(), b"abcdef")
+        stream = BytesIO(b"abc")
+        stream.headers = {"Content-Length": "6"}
+        self.assertEqual(util.buffer_stream(stream).read(), b"abc")